@@ -2,7 +2,7 @@
 import inspect
 import sys
 
-from .base_activity import ActivityEncoder, Signature
+from .base_activity import ActivityEncoder, Signature, serialize_bytes
 from .base_activity import Link, Mention
 from .base_activity import ActivitySerializerError, resolve_remote_id
 from .image import Image
@@ -1,12 +1,20 @@
 ''' basics for an activitypub serializer '''
 from dataclasses import dataclass, fields, MISSING
+from functools import lru_cache
 from json import JSONEncoder
+import logging
 
 from django.apps import apps
 from django.db import IntegrityError, transaction
+import orjson
 
-from bookwyrm.connectors import ConnectorException, get_data
+from bookwyrm.connectors import ConnectorException, get_data, get_data_many
 from bookwyrm.tasks import app
+from bookwyrm.utils.slots import add_slots
+
+logger = logging.getLogger(__name__)
+
+ACTIVITYSTREAMS_CONTEXT = 'https://www.w3.org/ns/activitystreams'
 
 class ActivitySerializerError(ValueError):
     ''' routine problems serializing activitypub json '''
@@ -15,9 +23,29 @@ class ActivitySerializerError(ValueError):
 class ActivityEncoder(JSONEncoder):
     '''  used to convert an Activity object into json '''
     def default(self, o):
-        return o.__dict__
+        if hasattr(o, '__dict__'):
+            return o.__dict__
+        # slotted dataclasses, like Link
+        return {f.name: getattr(o, f.name) for f in fields(o)}
+
+
+def serialize_bytes(data):
+    ''' json encode activities with orjson, which is much faster than the
+    stdlib json module and already knows how to handle dataclasses '''
+    return orjson.dumps(
+        data,
+        default=serialize_default,
+        option=orjson.OPT_NON_STR_KEYS
+    )
+
 
+def serialize_default(o):
+    ''' the equivalent of ActivityEncoder.default for anything orjson
+    doesn't already handle, like MISSING '''
+    return o.__dict__
 
+
+@add_slots
 @dataclass
 class Link:
     ''' for tagging a book in a status '''
@@ -26,12 +54,14 @@ class Link:
     type: str = 'Link'
 
 
+@add_slots
 @dataclass
 class Mention(Link):
     ''' a subtype of Link for mentioning an actor '''
     type: str = 'Mention'
 
 
+@add_slots
 @dataclass
 class Signature:
     ''' public key block '''
@@ -51,33 +81,81 @@ class ActivityObject:
         ''' this lets you pass in an object with fields that aren't in the
         dataclass, which it ignores. Any field in the dataclass is required or
         has a default value '''
-        for field in fields(self):
-            try:
-                value = kwargs[field.name]
-            except KeyError:
-                if field.default == MISSING and \
-                        field.default_factory == MISSING:
-                    raise ActivitySerializerError(\
-                            'Missing required field: %s' % field.name)
-                value = field.default
-            setattr(self, field.name, value)
+        self.get_init()(self, kwargs)
+
+
+    @classmethod
+    def get_init(cls):
+        ''' a function that sets each of this class's fields in a straight
+        line, generated the same way dataclass makes its __init__ '''
+        # looked up in the class's own dict so subclasses don't inherit it
+        init = cls.__dict__.get('_init')
+        if init is None:
+            lines = []
+            defaults = {}
+            for (name, default, required) in cls.get_init_fields():
+                if required:
+                    lines.append('self.%s = kwargs[%r]' % (name, name))
+                else:
+                    defaults['_default_%s' % name] = default
+                    lines.append(
+                        'self.%s = kwargs.get(%r, _default_%s)' % \
+                                (name, name, name))
+            source = '\n'.join([
+                'def init(self, kwargs):',
+                '    try:',
+                *('        %s' % l for l in lines or ['pass']),
+                '    except KeyError as e:',
+                '        raise ActivitySerializerError(',
+                '            \'Missing required field: %s\' % e.args[0])',
+            ])
+            namespace = {}
+            exec(source, { # pylint: disable=exec-used
+                'ActivitySerializerError': ActivitySerializerError,
+                **defaults
+            }, namespace)
+            init = cls._init = namespace['init']
+        return init
+
+
+    @classmethod
+    def get_init_fields(cls):
+        ''' the dataclass fields only change per class, not per instance '''
+        # looked up in the class's own dict so subclasses don't inherit it
+        init_fields = cls.__dict__.get('_init_fields')
+        if init_fields is None:
+            init_fields = tuple(
+                (
+                    f.name,
+                    f.default,
+                    f.default is MISSING and f.default_factory is MISSING
+                ) for f in fields(cls)
+            )
+            cls._init_fields = init_fields
+        return init_fields
 
 
     def to_model(self, model, instance=None, save=True):
         ''' convert from an activity to a model instance '''
-        if not isinstance(self, model.activity_serializer):
+        serializer = model.activity_serializer
+        # the exact type check is cheap and almost always the case
+        if type(self) is not serializer and \
+                not isinstance(self, serializer):
             raise ActivitySerializerError(
                 'Wrong activity type "%s" for model "%s" (expects "%s")' % \
                         (self.__class__,
                          model.__name__,
-                         model.activity_serializer)
+                         serializer)
             )
 
         if hasattr(model, 'ignore_activity') and model.ignore_activity(self):
             return instance
 
-        # check for an existing instance, if we're not updating a known obj
-        instance = instance or model.find_existing(self.serialize()) or model()
+        # check for an existing instance, if we're not updating a known obj.
+        # the remote id is usually enough, and is cheaper than serializing
+        instance = instance or \
+                (self.id and model.find_existing_by_remote_id(self.id)) or \
+                model.find_existing(self.serialize()) or model()
 
         for field in instance.simple_fields:
             field.set_field_from_activity(instance, self)
@@ -89,20 +167,38 @@ class ActivityObject:
 
         if not save:
             return instance
+        return self.complete_model(model, instance)
 
+
+    def complete_model(self, model, instance):
+        ''' save an instance built by to_model(save=False) along with its
+        many to many and reverse fields '''
         with transaction.atomic():
-            # we can't set many to many and reverse fields on an unsaved object
-            try:
-                instance.save()
-            except IntegrityError as e:
-                raise ActivitySerializerError(e)
-
-            # add many to many fields, which have to be set post-save
-            for field in instance.many_to_many_fields:
-                # mention books/users, for example
-                field.set_field_from_activity(instance, self)
-
-        # reversed relationships in the models
+            self.save_model(instance)
+            self.set_many_to_many_fields(instance)
+
+        self.set_reverse_fields(model, instance)
+        return instance
+
+
+    def save_model(self, instance):
+        ''' save an instance built by to_model(save=False) '''
+        # we can't set many to many and reverse fields on an unsaved object
+        try:
+            instance.save()
+        except IntegrityError as e:
+            raise ActivitySerializerError(e)
+
+
+    def set_many_to_many_fields(self, instance):
+        ''' add many to many fields, which have to be set post-save '''
+        for field in instance.many_to_many_fields:
+            # mention books/users, for example
+            field.set_field_from_activity(instance, self)
+
+
+    def set_reverse_fields(self, model, instance):
+        ''' reversed relationships in the models are loaded in a task '''
         for (model_field_name, activity_field_name) in \
                 instance.deserialize_reverse_fields:
             # attachments on Status, for example
@@ -110,74 +206,135 @@ class ActivityObject:
             if values is None or values is MISSING:
                 continue
 
-            model_field = getattr(model, model_field_name)
-            # creating a Work, model_field is 'editions'
-            # creating a User, model field is 'key_pair'
-            related_model = model_field.field.model
-            related_field_name = model_field.field.name
-
-            for item in values:
-                set_related_field.delay(
-                    related_model.__name__,
-                    instance.__class__.__name__,
-                    related_field_name,
-                    instance.remote_id,
-                    item
-                )
-        return instance
+            related_model_name, related_field_name = \
+                    get_related_field(model, model_field_name)
+            set_related_fields_bulk.delay(
+                related_model_name,
+                instance.__class__.__name__,
+                related_field_name,
+                instance.remote_id,
+                list(values)
+            )
 
 
     def serialize(self):
         ''' convert to dictionary with context attr '''
         data = self.__dict__
-        data['@context'] = 'https://www.w3.org/ns/activitystreams'
+        data['@context'] = ACTIVITYSTREAMS_CONTEXT
         return data
 
 
 @app.task
-@transaction.atomic
 def set_related_field(
         model_name, origin_model_name, related_field_name,
         related_remote_id, data):
     ''' load reverse related fields (editions, attachments) without blocking '''
-    model = apps.get_model('bookwyrm.%s' % model_name, require_ready=True)
-    origin_model = apps.get_model(
-        'bookwyrm.%s' % origin_model_name,
-        require_ready=True
-    )
+    set_related_fields(
+        model_name, origin_model_name, related_field_name,
+        related_remote_id, [data])
+
 
-    with transaction.atomic():
+@app.task
+def set_related_fields_bulk(
+        model_name, origin_model_name, related_field_name,
+        related_remote_id, items):
+    ''' load all the items of a reverse related field in one task '''
+    set_related_fields(
+        model_name, origin_model_name, related_field_name,
+        related_remote_id, items)
+
+
+@transaction.atomic
+def set_related_fields(
+        model_name, origin_model_name, related_field_name,
+        related_remote_id, items):
+    ''' create or update each item and point it at the origin object '''
+    model = get_model('bookwyrm.%s' % model_name)
+    origin_model = get_model('bookwyrm.%s' % origin_model_name)
+
+    # this must exist because it's the object that triggered this function
+    instance = origin_model.find_existing_by_remote_id(related_remote_id)
+    if not instance:
+        raise ValueError(
+            'Invalid related remote id: %s' % related_remote_id)
+
+    # items can be remote ids, so look them all up at once
+    remote_ids = [i for i in items if isinstance(i, str)]
+    existing = model.find_existing_by_remote_ids(remote_ids)
+    missing = [i for i in dict.fromkeys(remote_ids) if i not in existing]
+    # an unreachable item is skipped rather than failing the whole batch
+    loaded = dict(zip(missing, get_data_many(missing, skip_errors=True)))
+
+    # first create or update every item, then set their many to many and
+    # reverse fields once all of them exist
+    built = []
+    for data in items:
+        known = None
         if isinstance(data, str):
-            existing = model.find_existing_by_remote_id(data)
-            if existing:
-                data = existing.to_activity()
+            if data in existing:
+                # keep the object, so to_model doesn't look it up again
+                known = existing[data]
+                data = known.to_activity()
             else:
-                data = get_data(data)
-        activity = model.activity_serializer(**data)
-
-        # this must exist because it's the object that triggered this function
-        instance = origin_model.find_existing_by_remote_id(related_remote_id)
-        if not instance:
-            raise ValueError(
-                'Invalid related remote id: %s' % related_remote_id)
-
-        # set the origin's remote id on the activity so it will be there when
-        # the model instance is created
-        # edition.parentWork = instance, for example
-        model_field = getattr(model, related_field_name)
-        if hasattr(model_field, 'activitypub_field'):
-            setattr(
-                activity,
-                getattr(model_field, 'activitypub_field'),
-                instance.remote_id
-            )
-        item = activity.to_model(model)
-
-        # if the related field isn't serialized (attachments on Status), then
-        # we have to set it post-creation
-        if not hasattr(model_field, 'activitypub_field'):
-            setattr(item, related_field_name, instance)
-            item.save()
+                data = loaded[data]
+                if data is None:
+                    continue
+        try:
+            # a savepoint for each item, so a bad one doesn't roll back the rest
+            with transaction.atomic():
+                saved = save_related_item(
+                    model, related_field_name, instance, data, known=known)
+        except ActivitySerializerError as e:
+            logger.exception(e)
+            continue
+        if saved:
+            built.append(saved)
+
+    for (activity, item) in built:
+        activity.set_many_to_many_fields(item)
+        activity.set_reverse_fields(model, item)
+
+
+def save_related_item(model, related_field_name, instance, data, known=None):
+    ''' create or update one item and point it at the origin object. known is
+    the item's model instance, if it's already been looked up '''
+    model_field = getattr(model, related_field_name)
+    activity = model.activity_serializer(**data)
+
+    # set the origin's remote id on the activity so it will be there when
+    # the model instance is created
+    # edition.parentWork = instance, for example
+    if hasattr(model_field, 'activitypub_field'):
+        setattr(
+            activity,
+            getattr(model_field, 'activitypub_field'),
+            instance.remote_id
+        )
+    item = activity.to_model(model, instance=known, save=False)
+    if item is None:
+        return None
+
+    # if the related field isn't serialized (attachments on Status), then
+    # we have to set it on the model directly
+    if not hasattr(model_field, 'activitypub_field'):
+        setattr(item, related_field_name, instance)
+    activity.save_model(item)
+    return (activity, item)
+
+
+@lru_cache(maxsize=64)
+def get_related_field(model, model_field_name):
+    ''' the model and field name on the other side of a reverse relation '''
+    model_field = getattr(model, model_field_name)
+    # creating a Work, model_field is 'editions'
+    # creating a User, model field is 'key_pair'
+    return model_field.field.model.__name__, model_field.field.name
+
+
+@lru_cache(maxsize=64)
+def get_model(name):
+    ''' the app registry doesn't change once it's loaded, so remember it '''
+    return apps.get_model(name, require_ready=True)
 
 
 def resolve_remote_id(model, remote_id, refresh=False, save=True):
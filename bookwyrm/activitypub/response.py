@@ -1,18 +1,22 @@
-from django.http import JsonResponse
+from django.http import HttpResponse
 
-from .base_activity import ActivityEncoder
+from .base_activity import serialize_bytes
 
-class ActivitypubResponse(JsonResponse):
+class ActivitypubResponse(HttpResponse):
     """
     A class to be used in any place that's serializing responses for
-    Activitypub enabled clients. Uses JsonResponse under the hood, but already
-    configures some stuff beforehand. Made to be a drop-in replacement of
-    JsonResponse.
+    Activitypub enabled clients. Works like JsonResponse, but the json is
+    encoded by orjson, so the encoder and json_dumps_params arguments aren't
+    accepted.
     """
-    def __init__(self, data, encoder=ActivityEncoder, safe=True,
-                 json_dumps_params=None, **kwargs):
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
 
         if 'content_type' not in kwargs:
             kwargs['content_type'] = 'application/activity+json'
 
-        super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+        super().__init__(content=serialize_bytes(data), **kwargs)
@@ -1,10 +1,9 @@
 ''' send out activitypub messages '''
-import json
 from django.utils.http import http_date
 import requests
 
 from bookwyrm import models, settings
-from bookwyrm.activitypub import ActivityEncoder
+from bookwyrm.activitypub import serialize_bytes
 from bookwyrm.tasks import app
 from bookwyrm.signatures import make_signature, make_digest
 
@@ -39,7 +38,7 @@ def broadcast(sender, activity, software=None, \
         recipients += get_public_recipients(sender, software=software)
     broadcast_task.delay(
         sender.id,
-        json.dumps(activity, cls=ActivityEncoder),
+        serialize_bytes(activity).decode('utf-8'),
         recipients
     )
 
@@ -73,7 +72,8 @@ def sign_and_send(sender, data, destination):
 
     response = requests.post(
         destination,
-        data=data,
+        # a str body would be sent as latin-1, but the digest is of the utf-8
+        data=data.encode('utf-8'),
         headers={
             'Date': now,
             'Digest': digest,
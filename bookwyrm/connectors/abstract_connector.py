@@ -1,18 +1,36 @@
 ''' functionality outline for a book data connector '''
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
+from hashlib import sha256
 import logging
+from urllib.parse import urlsplit, urlunsplit
 from urllib3.exceptions import RequestError
 
+from django.core.cache import cache
 from django.db import transaction
+import orjson
 import requests
 from requests import HTTPError
-from requests.exceptions import SSLError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import SSLError, Timeout
 
 from bookwyrm import activitypub, models, settings
+from bookwyrm.utils.slots import add_slots
 
 
 logger = logging.getLogger(__name__)
+# how long to hold on to remote json for revalidation, in seconds
+DATA_CACHE_TIMEOUT = 60 * 60
+# how long to wait on a remote server, in seconds
+REQUEST_TIMEOUT = 30
+
+# re-use connections to the same hosts instead of opening one per request
+SESSION = requests.Session()
+SESSION.headers.update({'User-Agent': settings.USER_AGENT})
+SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=64))
+SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=64))
+
 class ConnectorException(HTTPError):
     ''' when the connector can't do what was asked '''
 
@@ -40,17 +58,18 @@ class AbstractMinimalConnector(ABC):
 
     def search(self, query, min_confidence=None):# pylint: disable=unused-argument
         ''' free text search '''
-        resp = requests.get(
-            '%s%s' % (self.search_url, query),
-            headers={
-                'Accept': 'application/json; charset=utf-8',
-                'User-Agent': settings.USER_AGENT,
-            },
-        )
+        try:
+            resp = SESSION.get(
+                '%s%s' % (self.search_url, query),
+                headers={'Accept': 'application/json; charset=utf-8'},
+                timeout=REQUEST_TIMEOUT,
+            )
+        except Timeout as e:
+            raise ConnectorException('Search request timed out', e)
         if not resp.ok:
             resp.raise_for_status()
         try:
-            data = resp.json()
+            data = orjson.loads(resp.content)
         except ValueError as e:
             logger.exception(e)
             raise ConnectorException('Unable to parse json response', e)
@@ -90,7 +109,6 @@ class AbstractConnector(AbstractMinimalConnector):
         return True
 
 
-    @transaction.atomic
     def get_or_create_book(self, remote_id):
         ''' translate arbitrary json into an Activitypub dataclass '''
         # first, check if we have the origin_id saved
@@ -125,40 +143,58 @@ class AbstractConnector(AbstractMinimalConnector):
 
         # create activitypub object
         work_activity = activitypub.Work(**work_data)
+        # loading the cover and the authors goes out to the network, so it
+        # happens before there's a transaction holding a db connection open.
         # this will dedupe automatically
-        work = work_activity.to_model(models.Work)
-        for author in self.get_authors_from_data(data):
-            work.authors.add(author)
-        return self.create_edition_from_data(work, edition_data)
-
-
-    def create_edition_from_data(self, work, edition_data):
-        ''' if we already have the work, we're ready '''
-        mapped_data = dict_from_mappings(edition_data, self.book_mappings)
+        work = work_activity.to_model(models.Work, save=False)
+        authors = list(self.get_authors_from_data(data))
+
+        with transaction.atomic():
+            work = work_activity.complete_model(models.Work, work)
+            work.authors.add(*authors)
+            # don't map the same data twice if the edition data is the original
+            return self.create_edition_from_data(
+                work, edition_data,
+                mapped_data=mapped_data if edition_data is data else None
+            )
+
+
+    def create_edition_from_data(self, work, edition_data, mapped_data=None):
+        ''' if we already have the work, we're ready. mapped_data is
+        edition_data already run through the book mappings, if available '''
+        if mapped_data is None:
+            mapped_data = dict_from_mappings(edition_data, self.book_mappings)
+        else:
+            # the caller may still be using it as the work data
+            mapped_data = dict(mapped_data)
         mapped_data['work'] = work.remote_id
         edition_activity = activitypub.Edition(**mapped_data)
-        edition = edition_activity.to_model(models.Edition)
+        # set the connector before the first save, rather than saving twice
+        edition = edition_activity.to_model(models.Edition, save=False)
         edition.connector = self.connector
-        edition.save()
+        edition = edition_activity.complete_model(models.Edition, edition)
 
+        # a full work.save() would re-write every column for this one field
+        models.Work.objects.filter(pk=work.pk).update(default_edition=edition)
         work.default_edition = edition
-        work.save()
 
-        for author in self.get_authors_from_data(edition_data):
-            edition.authors.add(author)
-        if not edition.authors.exists() and work.authors.exists():
+        authors = list(self.get_authors_from_data(edition_data))
+        if authors:
+            edition.authors.add(*authors)
+        elif not edition.authors.exists():
             edition.authors.set(work.authors.all())
 
         return edition
 
 
-    def get_or_create_author(self, remote_id):
-        ''' load that author '''
-        existing = models.Author.find_existing_by_remote_id(remote_id)
-        if existing:
-            return existing
-
-        data = get_data(remote_id)
+    def get_or_create_author(self, remote_id, data=None):
+        ''' load that author. if the caller already fetched the json, it has
+        also already checked that the author isn't in the database '''
+        if data is None:
+            existing = models.Author.find_existing_by_remote_id(remote_id)
+            if existing:
+                return existing
+            data = get_data(remote_id)
 
         mapped_data = dict_from_mappings(data, self.author_mappings)
         activity = activitypub.Author(**mapped_data)
@@ -192,48 +228,98 @@ def dict_from_mappings(data, mappings):
     the subclass '''
     result = {}
     for mapping in mappings:
-        result[mapping.local_field] = mapping.get_value(data)
+        # the same as mapping.get_value, but inlined because this runs for
+        # every field of every book that gets loaded
+        value = data.get(mapping.remote_field)
+        if not value:
+            value = None
+        elif mapping.formatter is not noop:
+            try:
+                value = mapping.formatter(value)
+            except:# pylint: disable=bare-except
+                value = None
+        result[mapping.local_field] = value
     return result
 
 
 def get_data(url):
     ''' wrapper for request.get '''
+    headers = {'Accept': 'application/json; charset=utf-8'}
+    # if we've seen this url before, ask the server if it's changed
+    cache_key = get_data_cache_key(url)
+    cached = cache.get(cache_key)
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
     try:
-        resp = requests.get(
-            url,
-            headers={
-                'Accept': 'application/json; charset=utf-8',
-                'User-Agent': settings.USER_AGENT,
-            },
-        )
-    except RequestError:
+        resp = SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    except (RequestError, Timeout):
         raise ConnectorException()
+    if cached and resp.status_code == 304:
+        return cached['data']
     if not resp.ok:
         resp.raise_for_status()
     try:
-        data = resp.json()
+        data = orjson.loads(resp.content)
     except ValueError:
         raise ConnectorException()
 
+    etag = resp.headers.get('ETag')
+    last_modified = resp.headers.get('Last-Modified')
+    if etag or last_modified:
+        cache.set(cache_key, {
+            'etag': etag,
+            'last_modified': last_modified,
+            'data': data,
+        }, DATA_CACHE_TIMEOUT)
     return data
 
 
+def get_data_cache_key(url):
+    ''' the same remote resource can be linked with different urls '''
+    parts = urlsplit(url)
+    # drop the fragment, and the host isn't case sensitive
+    normalized = urlunsplit(
+        (parts.scheme, parts.netloc.lower(), parts.path, parts.query, ''))
+    return 'get_data:%s' % sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def get_data_many(urls, skip_errors=False):
+    ''' load several urls at once, returned in the same order as the urls.
+    with skip_errors, a url that can't be loaded gives None instead of
+    failing all the others '''
+    if not urls:
+        return []
+
+    def get_data_or_none(url):
+        try:
+            return get_data(url)
+        except requests.exceptions.RequestException as e:
+            # this also covers hosts that can't be reached at all
+            logger.exception(e)
+            return None
+
+    load = get_data_or_none if skip_errors else get_data
+    # the requests are network bound, so threads let them wait in parallel
+    with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as executor:
+        return list(executor.map(load, urls))
+
+
 def get_image(url):
     ''' wrapper for requesting an image '''
     try:
-        resp = requests.get(
-            url,
-            headers={
-                'User-Agent': settings.USER_AGENT,
-            },
-        )
-    except (RequestError, SSLError):
+        resp = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    except (RequestError, SSLError, Timeout):
         return None
     if not resp.ok:
         return None
     return resp
 
 
+@add_slots
 @dataclass
 class SearchResult:
     ''' standardized search result object '''
@@ -258,8 +344,6 @@ class SearchResult:
 class Mapping:
     ''' associate a local database field with a field in an external dataset '''
     def __init__(self, local_field, remote_field=None, formatter=None):
-        noop = lambda x: x
-
         self.local_field = local_field
         self.remote_field = remote_field or local_field
         self.formatter = formatter or noop
@@ -273,3 +357,8 @@ class Mapping:
             return self.formatter(value)
         except:# pylint: disable=bare-except
             return None
+
+
+def noop(value):
+    ''' the default Mapping formatter, which leaves the value alone '''
+    return value
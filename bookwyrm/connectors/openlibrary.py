@@ -3,7 +3,7 @@ import re
 
 from bookwyrm import models
 from .abstract_connector import AbstractConnector, SearchResult, Mapping
-from .abstract_connector import ConnectorException, get_data
+from .abstract_connector import ConnectorException, get_data, get_data_many
 from .openlibrary_languages import languages
 
 
@@ -96,12 +96,23 @@ class Connector(AbstractConnector):
 
     def get_authors_from_data(self, data):
         ''' parse author json and load or create authors '''
+        urls = []
         for author_blob in data.get('authors', []):
             author_blob = author_blob.get('author', author_blob)
             # this id is "/authors/OL1234567A"
             author_id = author_blob['key']
-            url = '%s%s' % (self.base_url, author_id)
-            yield self.get_or_create_author(url)
+            urls.append('%s%s' % (self.base_url, author_id))
+
+        # look up all the authors at once, and fetch the ones we don't know
+        # about yet in one go
+        existing = models.Author.find_existing_by_remote_ids(urls)
+        missing = [u for u in dict.fromkeys(urls) if u not in existing]
+        prefetched = dict(zip(missing, get_data_many(missing)))
+        for url in urls:
+            if url not in existing:
+                existing[url] = self.get_or_create_author(
+                    url, data=prefetched[url])
+            yield existing[url]
 
 
     def get_cover_url(self, cover_blob):
@@ -14,7 +14,8 @@ from django.dispatch import receiver
 
 from bookwyrm import activitypub
 from bookwyrm.settings import DOMAIN, PAGE_LENGTH
-from .fields import ImageField, ManyToManyField, RemoteIdField
+from .fields import ForeignKey, ImageField, ManyToManyField, OneToOneField
+from .fields import RemoteIdField
 
 
 class BookWyrmModel(models.Model):
@@ -98,6 +99,44 @@ class ActivitypubMixin:
         ''' look up a remote id in the db '''
         return cls.find_existing({'id': remote_id})
 
+    @classmethod
+    def find_existing_by_remote_ids(cls, remote_ids):
+        ''' look up many remote ids in one query, as a remote_id: obj dict '''
+        if not remote_ids:
+            return {}
+        match = Q(remote_id__in=remote_ids)
+        if hasattr(cls, 'origin_id'):
+            # books can also be matched by where they were loaded from
+            match |= Q(origin_id__in=remote_ids)
+
+        # callers use these to build activities
+        found = {}
+        for obj in cls.activity_queryset().filter(match):
+            found.setdefault(obj.remote_id, obj)
+            if getattr(obj, 'origin_id', None):
+                found.setdefault(obj.origin_id, obj)
+        return found
+
+    @classmethod
+    def activity_queryset(cls):
+        ''' objects along with the related rows that to_activity serializes,
+        so it doesn't have to query for them one by one '''
+        select = []
+        prefetch = []
+        for field in cls._meta.get_fields():
+            if isinstance(field, ManyToManyField):
+                if not field.link_only:
+                    prefetch.append(field.name)
+            elif isinstance(field, (ForeignKey, OneToOneField)):
+                select.append(field.name)
+        # for example, editions of a work
+        prefetch += [f for f, _ in getattr(cls, 'serialize_reverse_fields', [])]
+
+        objects = cls.objects
+        if hasattr(objects, 'select_subclasses'):
+            objects = objects.select_subclasses()
+        return objects.select_related(*select).prefetch_related(*prefetch)
+
     @classmethod
     def find_existing(cls, data):
         ''' compare data to fields that can be used for deduplation.
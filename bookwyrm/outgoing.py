@@ -2,7 +2,6 @@
 import re
 
 from django.db import IntegrityError, transaction
-from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
@@ -30,9 +29,9 @@ def outbox(request, username):
     if filter_type not in models.status_models:
         filter_type = None
 
-    return JsonResponse(
+    return activitypub.ActivitypubResponse(
         user.to_outbox(**request.GET, filter_type=filter_type),
-        encoder=activitypub.ActivityEncoder
+        content_type='application/json'
     )
 
 
@@ -108,6 +108,21 @@ DATABASES = {
     'default': BOOKWYRM_DBS[BOOKWYRM_DATABASE_BACKEND]
 }
 
+# the web app and the celery workers share the cache through redis. without
+# a CACHE_URL each process falls back to its own in-memory cache
+CACHE_URL = env('CACHE_URL', '')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_URL,
+            'OPTIONS': {
+                # the cache only saves work, so carry on if redis is down
+                'IGNORE_EXCEPTIONS': True,
+            },
+        }
+    }
+
 
 LOGIN_URL = '/login/'
 AUTH_USER_MODEL = 'bookwyrm.User'
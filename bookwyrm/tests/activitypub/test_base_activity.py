@@ -11,7 +11,7 @@ import responses
 
 from bookwyrm import activitypub
 from bookwyrm.activitypub.base_activity import ActivityObject, \
-    resolve_remote_id, set_related_field
+    resolve_remote_id, set_related_field, set_related_fields_bulk
 from bookwyrm.activitypub import ActivitySerializerError
 from bookwyrm import models
 
@@ -74,6 +74,24 @@ class BaseActivity(TestCase):
         self.assertEqual(serialized['id'], 'a')
         self.assertEqual(serialized['type'], 'b')
 
+    def test_encode_slotted(self):
+        ''' links don't have a __dict__ but still turn into json '''
+        link = activitypub.Mention(href='http://a.b/c', name='c')
+        self.assertFalse(hasattr(link, '__dict__'))
+        self.assertEqual(
+            json.loads(json.dumps(link, cls=activitypub.ActivityEncoder)),
+            {'href': 'http://a.b/c', 'name': 'c', 'type': 'Mention'}
+        )
+
+    def test_serialize_bytes(self):
+        ''' orjson encoding matches the stdlib encoder '''
+        instance = ActivityObject(id='a', type='b')
+        instance.tag = [activitypub.Link(href='http://a.b/c', name='c')]
+        self.assertEqual(
+            json.loads(activitypub.serialize_bytes(instance)),
+            json.loads(json.dumps(instance, cls=activitypub.ActivityEncoder))
+        )
+
     @responses.activate
     def test_resolve_remote_id(self):
         ''' look up or load remote data '''
@@ -233,7 +251,8 @@ class BaseActivity(TestCase):
 
         # sets the celery task call to the function call
         with patch(
-                'bookwyrm.activitypub.base_activity.set_related_field.delay'):
+                'bookwyrm.activitypub.base_activity.'
+                'set_related_fields_bulk.delay'):
             update_data.to_model(models.Status, instance=status)
         self.assertIsNone(status.attachments.first())
 
@@ -260,3 +279,107 @@ class BaseActivity(TestCase):
 
         self.assertIsInstance(status.attachments.first(), models.Image)
         self.assertIsNotNone(status.attachments.first().image)
+
+
+    @responses.activate
+    def test_set_related_fields_bulk(self):
+        ''' all the items of a reverse field in one celery task '''
+        status = models.Status.objects.create(
+            content='test status',
+            user=self.user,
+        )
+        data = [{
+            'url': 'http://www.example.com/image%d.jpg' % i,
+            'name': 'alt text',
+            'type': 'Image',
+        } for i in range(2)]
+        for i in range(2):
+            responses.add(
+                responses.GET,
+                'http://www.example.com/image%d.jpg' % i,
+                body=self.image_data,
+                status=200)
+        set_related_fields_bulk(
+            'Image', 'Status', 'status', status.remote_id, data)
+
+        self.assertEqual(status.attachments.count(), 2)
+
+
+    def test_set_related_fields_bulk_existing(self):
+        ''' items that are already in the database are only looked up once '''
+        work = models.Work.objects.create(title='Test Work')
+        editions = [models.Edition.objects.create(
+            title='Test Edition %d' % i,
+            remote_id='http://book.com/book/%d' % i) for i in range(2)]
+
+        with patch.object(
+                models.Edition, 'find_existing_by_remote_id') as lookup:
+            set_related_fields_bulk(
+                'Edition', 'Work', 'parent_work', work.remote_id,
+                [e.remote_id for e in editions])
+            self.assertFalse(lookup.called)
+
+        self.assertEqual(work.editions.count(), 2)
+
+
+    @responses.activate
+    def test_set_related_fields_bulk_malformed(self):
+        ''' one item with bad data doesn't roll back the others '''
+        status = models.Status.objects.create(
+            content='test status',
+            user=self.user,
+        )
+        responses.add(
+            responses.GET,
+            'http://www.example.com/image.jpg',
+            body=self.image_data,
+            status=200)
+        data = [{
+            'url': 'http://www.example.com/image.jpg',
+            'name': 'alt text',
+            'type': 'Image',
+        }, {
+            # missing the required url field
+            'name': 'alt text',
+            'type': 'Image',
+        }]
+        set_related_fields_bulk(
+            'Image', 'Status', 'status', status.remote_id, data)
+
+        self.assertEqual(status.attachments.count(), 1)
+
+
+    @responses.activate
+    def test_set_related_fields_bulk_unreachable(self):
+        ''' one item that can't be loaded doesn't stop the others '''
+        status = models.Status.objects.create(
+            content='test status',
+            user=self.user,
+        )
+        responses.add(
+            responses.GET,
+            'http://www.example.com/attachment/1',
+            json={
+                'url': 'http://www.example.com/image.jpg',
+                'name': 'alt text',
+                'type': 'Image',
+            },
+            status=200)
+        responses.add(
+            responses.GET,
+            'http://www.example.com/image.jpg',
+            body=self.image_data,
+            status=200)
+        responses.add(
+            responses.GET,
+            'http://www.example.com/attachment/2',
+            status=404)
+        set_related_fields_bulk(
+            'Image', 'Status', 'status', status.remote_id, [
+                'http://www.example.com/attachment/1',
+                'http://www.example.com/attachment/2',
+                # not registered, so responses raises a ConnectionError
+                'http://unreachable.example.com/attachment/3',
+            ])
+
+        self.assertEqual(status.attachments.count(), 1)
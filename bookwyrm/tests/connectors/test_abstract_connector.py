@@ -1,5 +1,7 @@
 ''' testing book data connectors '''
+from django.core.cache import cache
 from django.test import TestCase
+import requests
 import responses
 
 from bookwyrm import models
@@ -109,3 +111,91 @@ class AbstractConnector(TestCase):
         self.assertEqual(result, self.book)
         self.assertEqual(models.Edition.objects.count(), 1)
         self.assertEqual(models.Edition.objects.count(), 1)
+
+
+    @responses.activate
+    def test_get_data_many(self):
+        ''' load several urls concurrently, in order '''
+        responses.add(
+            responses.GET,
+            'https://example.com/book/1',
+            json={'id': 1}
+        )
+        responses.add(
+            responses.GET,
+            'https://example.com/book/2',
+            json={'id': 2}
+        )
+        result = abstract_connector.get_data_many([
+            'https://example.com/book/2', 'https://example.com/book/1'])
+        self.assertEqual(result, [{'id': 2}, {'id': 1}])
+        self.assertEqual(abstract_connector.get_data_many([]), [])
+
+
+    @responses.activate
+    def test_get_data_many_skip_errors(self):
+        ''' urls that fail or can't be reached give None '''
+        responses.add(
+            responses.GET,
+            'https://example.com/book/1',
+            json={'id': 1}
+        )
+        responses.add(
+            responses.GET,
+            'https://example.com/book/2',
+            status=404
+        )
+        # responses raises a ConnectionError for unregistered urls
+        urls = [
+            'https://example.com/book/1',
+            'https://example.com/book/2',
+            'https://unreachable.example.com/book/3',
+        ]
+        result = abstract_connector.get_data_many(urls, skip_errors=True)
+        self.assertEqual(result, [{'id': 1}, None, None])
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            abstract_connector.get_data_many(urls[2:])
+
+
+    @responses.activate
+    def test_get_data_revalidate(self):
+        ''' re-use cached json when the server says it hasn't changed '''
+        cache.clear()
+        responses.add(
+            responses.GET,
+            'https://example.com/book/etag',
+            json={'id': 'etag'},
+            headers={'ETag': '"abc"'}
+        )
+        responses.add(
+            responses.GET,
+            'https://example.com/book/etag',
+            status=304
+        )
+        url = 'https://example.com/book/etag'
+        self.assertEqual(abstract_connector.get_data(url), {'id': 'etag'})
+        self.assertEqual(abstract_connector.get_data(url), {'id': 'etag'})
+        self.assertEqual(
+            responses.calls[1].request.headers['If-None-Match'], '"abc"')
+        self.assertEqual(
+            abstract_connector.get_data_cache_key(url),
+            abstract_connector.get_data_cache_key(
+                'https://EXAMPLE.com/book/etag#fragment')
+        )
+
+
+    def test_create_edition_from_mapped_data(self):
+        ''' re-use book data that's already been mapped '''
+        work = models.Work.objects.create(title='Test Work')
+        mapped_data = {
+            'id': 'https://example.com/book/5678',
+            'title': 'Mapped edition',
+            'openlibraryKey': 'OL5678M',
+        }
+        edition = self.connector.create_edition_from_data(
+            work, {}, mapped_data=mapped_data)
+        self.assertEqual(edition.title, 'Mapped edition')
+        self.assertEqual(edition.parent_work, work)
+        self.assertEqual(edition.connector, self.connector_info)
+        self.assertFalse('work' in mapped_data)
@@ -98,3 +98,21 @@ class AbstractConnector(TestCase):
         self.assertEqual(mapping.remote_field, 'isbn')
         self.assertEqual(mapping.formatter, formatter)
         self.assertEqual(mapping.formatter('bb'), 'aabb')
+
+
+    def test_dict_from_mappings(self):
+        ''' apply a list of mappings to remote data '''
+        mappings = [
+            Mapping('isbn', remote_field='isbn13'),
+            Mapping('title', formatter=lambda x: x.upper()),
+            Mapping('pages', formatter=lambda x: int(x)),
+            Mapping('subtitle'),
+        ]
+        result = abstract_connector.dict_from_mappings(
+            {'isbn13': '123', 'title': 'hi', 'pages': 'many'}, mappings)
+        self.assertEqual(result, {
+            'isbn': '123',
+            'title': 'HI',
+            'pages': None,
+            'subtitle': None,
+        })
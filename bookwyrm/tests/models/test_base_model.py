@@ -202,6 +202,44 @@ class BaseModel(TestCase):
             'https://comment.net')
 
 
+    def test_find_existing_by_remote_ids(self):
+        ''' match many remote ids in one go '''
+        book = models.Edition.objects.create(
+            title='Test Edition', remote_id='http://book.com/book')
+        user = models.User.objects.create_user(
+            'mouse', 'mouse@mouse.mouse', 'mouseword', local=True)
+        comment = models.Comment.objects.create(
+            user=user, content='test status', book=book, \
+            remote_id='https://comment.net')
+
+        self.assertEqual(models.Status.find_existing_by_remote_ids([]), {})
+
+        result = models.Edition.find_existing_by_remote_ids(
+            ['http://book.com/book', 'hi'])
+        self.assertEqual(result['http://book.com/book'], book)
+        self.assertFalse('hi' in result)
+
+        # uses subclasses
+        result = models.Status.find_existing_by_remote_ids(
+            ['https://comment.net'])
+        self.assertEqual(result, {'https://comment.net': comment})
+        self.assertIsInstance(result['https://comment.net'], models.Comment)
+
+
+    def test_activity_queryset(self):
+        ''' load the related objects to_activity needs up front '''
+        work = models.Work.objects.create(title='Test Work')
+        book = models.Edition.objects.create(
+            title='Test Edition', parent_work=work)
+        author = models.Author.objects.create(name='Author')
+        book.authors.add(author)
+
+        result = models.Edition.activity_queryset().get(id=book.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(result.parent_work, work)
+            self.assertEqual(list(result.authors.all()), [author])
+
+
     def test_find_existing(self):
         ''' match a blob of data to a model '''
         book = models.Edition.objects.create(
@@ -1,7 +1,11 @@
+import json
 from unittest.mock import patch
 from django.test import TestCase
+import responses
 
 from bookwyrm import models, broadcast
+from bookwyrm.activitypub import serialize_bytes
+from bookwyrm.signatures import make_digest
 
 
 class Book(TestCase):
@@ -76,3 +80,22 @@ class Book(TestCase):
 
         recipients = broadcast.get_public_recipients(self.user, software='mastodon')
         self.assertEqual(recipients, expected)
+
+
+    @responses.activate
+    def test_sign_and_send_unicode(self):
+        ''' non-latin-1 text is sent as utf-8 '''
+        content = 'I “loved” this 📚 本'
+        data = serialize_bytes({'content': content}).decode('utf-8')
+        responses.add(
+            responses.POST,
+            'http://example.com/inbox',
+            status=200)
+
+        result = broadcast.sign_and_send(
+            self.user, data, 'http://example.com/inbox')
+
+        self.assertEqual(result.status_code, 200)
+        request = responses.calls[0].request
+        self.assertEqual(json.loads(request.body)['content'], content)
+        self.assertEqual(request.headers['Digest'], make_digest(data))
@@ -511,7 +511,8 @@ class Incoming(TestCase):
         self.assertEqual(book.title, 'Test Book')
 
         with patch(
-                'bookwyrm.activitypub.base_activity.set_related_field.delay'):
+                'bookwyrm.activitypub.base_activity.'
+                'set_related_fields_bulk.delay'):
             incoming.handle_update_edition({'object': bookdata})
         book = models.Edition.objects.get(id=book.id)
         self.assertEqual(book.title, 'Piranesi')
@@ -529,7 +530,8 @@ class Incoming(TestCase):
         del bookdata['authors']
         self.assertEqual(book.title, 'Test Book')
         with patch(
-                'bookwyrm.activitypub.base_activity.set_related_field.delay'):
+                'bookwyrm.activitypub.base_activity.'
+                'set_related_fields_bulk.delay'):
             incoming.handle_update_work({'object': bookdata})
         book = models.Work.objects.get(id=book.id)
         self.assertEqual(book.title, 'Piranesi')
@@ -3,29 +3,28 @@ import json
 import pathlib
 from unittest.mock import patch
 
-from django.http import JsonResponse
 from django.test import TestCase
 from django.test.client import RequestFactory
 import responses
 
-from bookwyrm import models, outgoing
+from bookwyrm import activitypub, models, outgoing
 from bookwyrm.settings import DOMAIN
 
 
 class Outgoing(TestCase):
     ''' sends out activities '''
-    def setUp(self):
-        ''' we'll need some data '''
-        self.factory = RequestFactory()
+    @classmethod
+    def setUpTestData(cls):
+        ''' we'll need some data, which is only created once for the class '''
         with patch('bookwyrm.models.user.set_remote_server'):
-            self.remote_user = models.User.objects.create_user(
+            cls.remote_user = models.User.objects.create_user(
                 'rat', 'rat@rat.com', 'ratword',
                 local=False,
                 remote_id='https://example.com/users/rat',
                 inbox='https://example.com/users/rat/inbox',
                 outbox='https://example.com/users/rat/outbox',
             )
-        self.local_user = models.User.objects.create_user(
+        cls.local_user = models.User.objects.create_user(
             'mouse', 'mouse@mouse.com', 'mouseword', local=True,
             localname='mouse', remote_id='https://example.com/users/mouse',
         )
@@ -33,27 +32,31 @@ class Outgoing(TestCase):
         datafile = pathlib.Path(__file__).parent.joinpath(
             'data/ap_user.json'
         )
-        self.userdata = json.loads(datafile.read_bytes())
-        del self.userdata['icon']
+        cls.userdata = json.loads(datafile.read_bytes())
+        del cls.userdata['icon']
 
         work = models.Work.objects.create(title='Test Work')
-        self.book = models.Edition.objects.create(
+        cls.book = models.Edition.objects.create(
             title='Example Edition',
             remote_id='https://example.com/book/1',
             parent_work=work
         )
-        self.shelf = models.Shelf.objects.create(
+        cls.shelf = models.Shelf.objects.create(
             name='Test Shelf',
             identifier='test-shelf',
-            user=self.local_user
+            user=cls.local_user
         )
 
+    def setUp(self):
+        ''' a fresh request factory for each test '''
+        self.factory = RequestFactory()
+
 
     def test_outbox(self):
         ''' returns user's statuses '''
         request = self.factory.get('')
         result = outgoing.outbox(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
 
     def test_outbox_bad_method(self):
         ''' can't POST to outbox '''
@@ -82,7 +85,7 @@ class Outgoing(TestCase):
 
         request = self.factory.get('')
         result = outgoing.outbox(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         data = json.loads(result.content)
         self.assertEqual(data['type'], 'OrderedCollection')
         self.assertEqual(data['totalItems'], 2)
@@ -97,14 +100,14 @@ class Outgoing(TestCase):
 
         request = self.factory.get('', {'type': 'bleh'})
         result = outgoing.outbox(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         data = json.loads(result.content)
         self.assertEqual(data['type'], 'OrderedCollection')
         self.assertEqual(data['totalItems'], 2)
 
         request = self.factory.get('', {'type': 'Review'})
         result = outgoing.outbox(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         data = json.loads(result.content)
         self.assertEqual(data['type'], 'OrderedCollection')
         self.assertEqual(data['totalItems'], 1)
@@ -8,7 +8,7 @@ from django.template.response import TemplateResponse
 from django.test import TestCase
 from django.test.client import RequestFactory
 
-from bookwyrm import models, views
+from bookwyrm import activitypub, models, views
 from bookwyrm.connectors import abstract_connector
 from bookwyrm.settings import DOMAIN
 
@@ -321,7 +321,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.user_page(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -339,7 +339,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.followers_page(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -357,7 +357,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.following_page(request, 'mouse')
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -377,7 +377,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.status_page(request, 'mouse', status.id)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -397,7 +397,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.replies_page(request, 'mouse', status.id)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -426,7 +426,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.book_page(request, self.book.id)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -467,7 +467,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.editions_page(request, self.work.id)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -486,7 +486,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.author_page(request, author.id)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -507,7 +507,7 @@ class Views(TestCase):
         with patch('bookwyrm.views.is_api_request') as is_api:
             is_api.return_value = True
             result = views.tag_page(request, tag.identifier)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
 
 
@@ -528,5 +528,5 @@ class Views(TestCase):
             is_api.return_value = True
             result = views.shelf_page(
                 request, self.local_user.username, shelf.identifier)
-        self.assertIsInstance(result, JsonResponse)
+        self.assertIsInstance(result, activitypub.ActivitypubResponse)
         self.assertEqual(result.status_code, 200)
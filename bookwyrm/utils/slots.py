@@ -0,0 +1,21 @@
+''' dataclasses without a per-instance __dict__ '''
+from dataclasses import fields
+
+
+def add_slots(cls):
+    ''' rebuild a dataclass with __slots__, like python 3.10's
+    dataclass(slots=True), for small objects that get made a lot '''
+    inherited = set()
+    for base in cls.__mro__[1:]:
+        inherited.update(getattr(base, '__slots__', ()))
+
+    field_names = [f.name for f in fields(cls)]
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = tuple(n for n in field_names if n not in inherited)
+    # the generated __init__ already has the defaults, and leaving them as
+    # class attributes would conflict with the slots
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)